@@ -1,19 +1,26 @@
 #!/usr/bin/env python3
 """
 PHG-France — build.py
-Génère data.json à partir de l'Excel + scanne les photos.
+Génère data.json à partir des Excel + scanne les photos.
 La structure du JSON est identique au const DATA du HTML existant.
 
+Tous les classeurs de excel/ sont lus en parallèle (un par fournisseur /
+origine), puis fusionnés par (référence, granit) selon EXCEL_PRIORITY.
+
 Usage:
     python build.py
     python build.py --verify   (compare avec le HTML existant)
+    python build.py --priority=PHG*.xlsx,Fournisseur*.xlsx   (ordre de priorité des classeurs)
+    python build.py --catalogues   (régénère aussi les catalogues PDF, cf. build_catalogue.py)
 """
 
+import fnmatch
 import json
 import os
 import sys
 import re
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 try:
@@ -30,6 +37,17 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXCEL_DIR = os.path.join(SCRIPT_DIR, "excel")
 PHOTOS_DIR = os.path.join(SCRIPT_DIR, "photos")
 OUTPUT_FILE = os.path.join(SCRIPT_DIR, "data.json")
+CONFLICTS_FILE = os.path.join(SCRIPT_DIR, "conflits_fusion.txt")
+
+# Priorité des classeurs en cas de doublon (référence, granit) :
+# motifs de noms de fichiers, du plus prioritaire au moins prioritaire.
+# Les fichiers non listés passent après, par ordre alphabétique.
+EXCEL_PRIORITY = [
+    "PHGFrance_*.xlsx",
+]
+
+# Nombre de conflits affichés par catégorie (la liste complète va dans CONFLICTS_FILE)
+MAX_CONFLICTS_SHOWN = 10
 
 # Onglets structurels fixes (peuvent être masqués)
 FIXED_TABS = {
@@ -55,8 +73,18 @@ PRODUCT_TAB_PATTERN = r".+\.PrixAdh\.€HT$"
 # ============================================================
 # UTILITAIRES
 # ============================================================
-def find_excel():
-    """Trouve le fichier Excel dans le dossier excel/."""
+def priority_rank(filename, priority):
+    """Rang d'un fichier dans la liste de priorité (non listé → après tous les autres)."""
+    for i, pattern in enumerate(priority):
+        if fnmatch.fnmatch(filename, pattern):
+            return i
+    return len(priority)
+
+
+def find_excels(priority=None):
+    """Trouve les fichiers Excel du dossier excel/, du plus prioritaire au moins prioritaire."""
+    if priority is None:
+        priority = EXCEL_PRIORITY
     if not os.path.isdir(EXCEL_DIR):
         print(f"❌ Dossier '{EXCEL_DIR}' introuvable.")
         sys.exit(1)
@@ -64,9 +92,8 @@ def find_excel():
     if not files:
         print(f"❌ Aucun fichier .xlsx dans '{EXCEL_DIR}'.")
         sys.exit(1)
-    if len(files) > 1:
-        print(f"⚠️  Plusieurs .xlsx trouvés, utilisation de : {files[0]}")
-    return os.path.join(EXCEL_DIR, files[0])
+    files.sort(key=lambda f: (priority_rank(f, priority), f))
+    return [os.path.join(EXCEL_DIR, f) for f in files]
 
 
 def clean_number(val, decimals=2):
@@ -244,15 +271,18 @@ def read_listes(wb):
                     "zone": str(zone)
                 })
 
-    # Ordre standard des types
+    return order_types(types), lignes_monument, lignes_accessoire, departements
+
+
+def order_types(types):
+    """Trie les types dans l'ordre standard, les types inconnus à la fin."""
     type_order = ["Monument", "Semelle", "Accessoire", "Urne", "Gravure", "Litho"]
     types_list = [t for t in type_order if t in types]
     # Ajouter les types détectés mais pas dans l'ordre standard
     for t in sorted(types):
         if t not in types_list:
             types_list.append(t)
-
-    return types_list, lignes_monument, lignes_accessoire, departements
+    return types_list
 
 
 # ============================================================
@@ -464,82 +494,346 @@ def read_generic_product(wb, tab_name, product_type):
 
 
 # ============================================================
-# ASSEMBLAGE
+# LECTURE D'UN CLASSEUR (exécuté dans un processus séparé)
 # ============================================================
-def build_data():
-    """Fonction principale : lit tout et assemble le data.json."""
-    excel_path = find_excel()
-    print(f"📂 Excel : {os.path.basename(excel_path)}")
-    print(f"📁 Photos : {PHOTOS_DIR}")
-    print()
+def read_product_tab(wb, tab_name):
+    """Lit un onglet produit avec le lecteur adapté → (clé JSON, items, message)."""
+    product_type = extract_product_type(tab_name)
+
+    if product_type == "Monument":
+        items = read_monuments(wb, tab_name)
+        key = "monuments"
+        refs = set(i["reference"] for i in items)
+        refs_with_photo = sum(1 for i in items if "photo" in i)
+        unique_refs = len(refs)
+        msg = f"{len(items)} lignes ({unique_refs} refs uniques, {refs_with_photo} lignes avec photo)"
+
+    elif product_type == "Semelle":
+        items = read_semelles(wb, tab_name)
+        key = "semelles"
+        msg = f"{len(items)} lignes"
+
+    elif product_type == "Accessoire":
+        items = read_accessoires(wb, tab_name)
+        key = "accessoires"
+        refs = set(i["reference"] for i in items)
+        refs_with_photo = sum(1 for i in items if "photo" in i)
+        msg = f"{len(items)} lignes ({len(refs)} refs uniques, {refs_with_photo} lignes avec photo)"
+
+    elif product_type == "Gravure":
+        items = read_gravures(wb, tab_name)
+        key = "gravures"
+        msg = f"{len(items)} lignes"
 
-    wb = openpyxl.load_workbook(excel_path, data_only=True)
+    else:
+        # Type générique (Litho, Urne, ou nouveau type futur)
+        items = read_generic_product(wb, tab_name, product_type)
+        key = product_type.lower() + "s"
+        msg = f"{len(items)} lignes (lecture générique)"
 
-    # ---- Onglets structurels ----
-    print("📋 Lecture des onglets structurels...")
-    granits = read_granits(wb)
-    poids = read_poids(wb)
-    zones_transport = read_zones_transport(wb)
-    tarifs_transport = read_tarifs_transport(wb)
-    types_list, lignes_monument, lignes_accessoire, departements = read_listes(wb)
-
-    granits_with_photo = sum(1 for g in granits if "photo" in g)
-    print(f"  ✅ {len(granits)} granits ({granits_with_photo} avec photo)")
-    print(f"  ✅ {len(poids)} poids")
-    print(f"  ✅ {len(zones_transport)} départements → zones")
-    print(f"  ✅ {len(tarifs_transport)} tarifs transport")
-    print(f"  ✅ {len(departements)} départements")
-    print(f"  ✅ Types : {types_list}")
-    print(f"  ✅ Lignes monument : {lignes_monument}")
-    print(f"  ✅ Lignes accessoire : {lignes_accessoire}")
-    print()
+    return key, items, msg
+
+
+def read_workbook(excel_path):
+    """Lit un classeur complet : onglets structurels présents + onglets produits.
+    Retourne un dict sérialisable (pour le pool de processus) ; les messages
+    sont renvoyés dans "log" pour être affichés dans l'ordre des classeurs.
+    """
+    filename = os.path.basename(excel_path)
+    wb = openpyxl.load_workbook(excel_path, data_only=True)
+    sheets = set(wb.sheetnames)
+    log = []
+
+    # ---- Onglets structurels (optionnels dans les grilles fournisseurs) ----
+    structure = {}
+    if "GRANITS" in sheets:
+        structure["granits"] = read_granits(wb)
+    if "Poids" in sheets:
+        structure["poids"] = read_poids(wb)
+    if "Zone.TFranco" in sheets:
+        structure["zones_transport"] = read_zones_transport(wb)
+    if "Tarif TFranco" in sheets:
+        structure["tarifs_transport"] = read_tarifs_transport(wb)
+    if "LISTES" in sheets:
+        types_list, lignes_monument, lignes_accessoire, departements = read_listes(wb)
+        structure["types"] = types_list
+        structure["lignes_monument"] = lignes_monument
+        structure["lignes_accessoire"] = lignes_accessoire
+        structure["departements"] = departements
+    log.append(f"📋 Onglets structurels : {sorted(structure) or 'aucun'}")
 
     # ---- Onglets produits (auto-détection) ----
     product_tabs = detect_product_tabs(wb)
-    print(f"🔍 Onglets produits détectés : {product_tabs}")
-    print()
+    log.append(f"🔍 Onglets produits détectés : {product_tabs}")
 
-    data = {
-        "granits": granits,
+    products = {}
+    product_types = []
+    for tab_name in product_tabs:
+        key, items, msg = read_product_tab(wb, tab_name)
+        product_types.append(extract_product_type(tab_name))
+        log.append(f"📦 {tab_name} (type: {extract_product_type(tab_name)}) : {msg}")
+        products.setdefault(key, []).extend(items)
+
+    return {
+        "file": filename,
+        "structure": structure,
+        "products": products,
+        "product_types": product_types,
+        "log": log,
     }
 
-    # Dictionnaires pour stocker les données par type
-    for tab_name in product_tabs:
-        product_type = extract_product_type(tab_name)
-        print(f"📦 Lecture : {tab_name} (type: {product_type})...")
-
-        if product_type == "Monument":
-            items = read_monuments(wb, tab_name)
-            key = "monuments"
-            refs = set(i["reference"] for i in items)
-            refs_with_photo = sum(1 for i in items if "photo" in i)
-            unique_refs = len(refs)
-            print(f"  ✅ {len(items)} lignes ({unique_refs} refs uniques, {refs_with_photo} lignes avec photo)")
-
-        elif product_type == "Semelle":
-            items = read_semelles(wb, tab_name)
-            key = "semelles"
-            print(f"  ✅ {len(items)} lignes")
-
-        elif product_type == "Accessoire":
-            items = read_accessoires(wb, tab_name)
-            key = "accessoires"
-            refs = set(i["reference"] for i in items)
-            refs_with_photo = sum(1 for i in items if "photo" in i)
-            print(f"  ✅ {len(items)} lignes ({len(refs)} refs uniques, {refs_with_photo} lignes avec photo)")
-
-        elif product_type == "Gravure":
-            items = read_gravures(wb, tab_name)
-            key = "gravures"
-            print(f"  ✅ {len(items)} lignes")
 
-        else:
-            # Type générique (Litho, Urne, ou nouveau type futur)
-            items = read_generic_product(wb, tab_name, product_type)
-            key = product_type.lower() + "s"
-            print(f"  ✅ {len(items)} lignes (lecture générique)")
+def read_workbooks(excel_paths):
+    """Lit les classeurs en parallèle. L'ordre du résultat suit celui de excel_paths."""
+    if len(excel_paths) == 1:
+        return [read_workbook(excel_paths[0])]
+    workers = min(len(excel_paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_workbook, excel_paths))
+
+
+# ============================================================
+# FUSION DES CLASSEURS
+# ============================================================
+def granit_key(granit):
+    """Normalise un nom de granit pour la fusion (casse, accents, espaces) :
+    'Gris Indien/Tarn' et 'Gris indien / Tarn' → 'gris indien/tarn'.
+    """
+    if not granit:
+        return ""
+    name = unicodedata.normalize("NFD", str(granit))
+    name = "".join(c for c in name if unicodedata.category(c) != "Mn")
+    name = re.sub(r"\s*/\s*", "/", name.strip())
+    return re.sub(r"\s+", " ", name).casefold()
+
+
+def product_key(item):
+    """Clé de fusion d'un produit : (référence normalisée, granit normalisé).
+    Sans référence (lecture générique), la clé est la ligne entière : seuls
+    les doublons exacts d'un classeur à l'autre sont fusionnés.
+    """
+    if not item.get("reference"):
+        return ("", json.dumps(item, ensure_ascii=False, sort_keys=True))
+    return (normalize_ref(item["reference"]), granit_key(item.get("granit")))
 
-        data[key] = items
+
+def diff_fields(kept_items, item):
+    """Champs qui diffèrent entre un item ignoré et la ligne retenue
+    de même origine (I/C) si elle existe, sinon la première ligne retenue.
+    """
+    kept = next((k for k in kept_items if k.get("origine") == item.get("origine")), kept_items[0])
+    keys = list(dict.fromkeys([*kept, *item]))
+    return [k for k in keys if kept.get(k) != item.get(k)]
+
+
+def merge_records(sources, key_fn, fields_fn=diff_fields):
+    """Fusionne des listes d'items par clé via un index (dict), sans double boucle.
+    `sources` = [(fichier, items), ...] du plus prioritaire au moins prioritaire.
+    Une clé appartient au premier classeur qui la fournit : toutes ses lignes
+    sont gardées telles quelles (ex. une ligne I et une ligne C), celles des
+    classeurs suivants sont ignorées, et signalées comme conflits si elles
+    diffèrent (fields_fn(lignes retenues, item) → champs en conflit).
+    Retourne (items fusionnés, conflits).
+    """
+    index = {}
+    merged = []
+    conflicts = []
+    for filename, items in sources:
+        for item in items:
+            key = key_fn(item)
+            owner = index.get(key)
+            if owner is None:
+                index[key] = (filename, [item])
+                merged.append(item)
+            elif owner[0] == filename:
+                owner[1].append(item)
+                merged.append(item)
+            elif item not in owner[1]:
+                conflicts.append({
+                    "key": key,
+                    "kept": owner[0],
+                    "ignored": filename,
+                    "fields": fields_fn(owner[1], item),
+                })
+    return merged, conflicts
+
+
+def merge_mappings(sources):
+    """Fusionne des dicts {clé: valeur} : le plus prioritaire l'emporte."""
+    items, conflicts = merge_records(
+        [(filename, list(mapping.items())) for filename, mapping in sources],
+        lambda kv: kv[0],
+        lambda kept_items, item: ["valeur"],
+    )
+    return dict(items), conflicts
+
+
+def merge_workbooks(results):
+    """Fusionne les résultats de read_workbook (déjà triés par priorité).
+    Retourne (data, conflits par catégorie).
+    """
+    def sources(section, key):
+        return [(r["file"], r[section][key]) for r in results if key in r[section]]
+
+    data = {}
+    conflicts = {}
+
+    granits, conflicts["granits"] = merge_records(sources("structure", "granits"), lambda g: g["code"])
+    data["granits"] = granits
+
+    # Produits : clés dans l'ordre de première apparition
+    product_keys = []
+    for r in results:
+        for key in r["products"]:
+            if key not in product_keys:
+                product_keys.append(key)
+    for key in product_keys:
+        data[key], conflicts[key] = merge_records(sources("products", key), product_key)
+
+    data["poids"], conflicts["poids"] = merge_mappings(sources("structure", "poids"))
+    data["zones_transport"], conflicts["zones_transport"] = merge_mappings(sources("structure", "zones_transport"))
+    data["tarifs_transport"], conflicts["tarifs_transport"] = merge_records(
+        sources("structure", "tarifs_transport"), lambda t: t["zone"])
+    data["departements"], conflicts["departements"] = merge_records(
+        sources("structure", "departements"), lambda d: d["departement"])
+
+    # Types des LISTES + types de tous les onglets produits lus
+    types, _ = merge_records(
+        sources("structure", "types") + [(r["file"], r["product_types"]) for r in results],
+        lambda t: t,
+    )
+    data["types"] = order_types(types)
+    data["lignes_monument"], _ = merge_records(sources("structure", "lignes_monument"), lambda l: l)
+    data["lignes_accessoire"], _ = merge_records(sources("structure", "lignes_accessoire"), lambda l: l)
+
+    return data, {k: v for k, v in conflicts.items() if v}
+
+
+def strip_accents(text):
+    """'JARDINIÈRE' → 'JARDINIERE'."""
+    text = unicodedata.normalize("NFD", text)
+    return "".join(c for c in text if unicodedata.category(c) != "Mn")
+
+
+def ligne_monument_label(ligne):
+    """Libellé LISTES d'une ligne de monument, comme le reconstruit onLigneChange
+    (index.html) : 'LIGNE CLASSIQUE' → 'CLASSIQUE', 'MONUMENTS DOUBLES' → 'DOUBLES'.
+    None si la ligne ne peut pas être retrouvée depuis le sélecteur.
+    """
+    if ligne == "MONUMENTS DOUBLES":
+        return "DOUBLES"
+    if ligne.startswith("LIGNE "):
+        return ligne[len("LIGNE "):].strip() or None
+    return None
+
+
+def complete_lignes(data):
+    """Ajoute aux listes des sélecteurs (lignes_monument, lignes_accessoire)
+    les lignes et types présents dans les produits fusionnés mais absents des
+    LISTES, ex. apportés par une grille fournisseur sans onglet LISTES.
+    Retourne les messages à afficher.
+    """
+    messages = []
+
+    for ligne in dict.fromkeys(m.get("ligne", "") for m in data.get("monuments", [])):
+        if not ligne:
+            continue
+        label = ligne_monument_label(ligne)
+        if label is None:
+            messages.append(f"⚠️  Ligne monument '{ligne}' non sélectionnable "
+                            f"(attendu 'LIGNE …' ou 'MONUMENTS DOUBLES')")
+        elif label not in data["lignes_monument"]:
+            data["lignes_monument"].append(label)
+            messages.append(f"ℹ️  Ligne monument ajoutée : {label}")
+
+    # index.html compare les types d'accessoires sans accents ni casse
+    known = {strip_accents(l).upper() for l in data["lignes_accessoire"]}
+    for typ in dict.fromkeys(a.get("type", "") for a in data.get("accessoires", [])):
+        if typ and strip_accents(typ).upper() not in known:
+            known.add(strip_accents(typ).upper())
+            data["lignes_accessoire"].append(typ)
+            messages.append(f"ℹ️  Type d'accessoire ajouté : {typ}")
+
+    return messages
+
+
+def format_conflict(category, c):
+    """Ligne lisible décrivant un conflit de fusion."""
+    key = " / ".join(str(k) for k in c["key"]) if isinstance(c["key"], tuple) else str(c["key"])
+    return (f"{category} [{key}] : {', '.join(c['fields'])} diffère — "
+            f"retenu {c['kept']}, ignoré {c['ignored']}")
+
+
+def report_conflicts(conflicts):
+    """Affiche un résumé des conflits et écrit la liste complète dans CONFLICTS_FILE."""
+    if not conflicts:
+        if os.path.isfile(CONFLICTS_FILE):
+            os.remove(CONFLICTS_FILE)
+        return
+
+    total = sum(len(v) for v in conflicts.values())
+    print(f"⚠️  {total} conflit(s) de fusion (le classeur le plus prioritaire l'emporte) :")
+    lines = []
+    for category, items in conflicts.items():
+        print(f"  ⚠️  {category} : {len(items)} conflit(s)")
+        for i, c in enumerate(items):
+            line = format_conflict(category, c)
+            lines.append(line)
+            if i < MAX_CONFLICTS_SHOWN:
+                print(f"     - {line}")
+        if len(items) > MAX_CONFLICTS_SHOWN:
+            print(f"     … et {len(items) - MAX_CONFLICTS_SHOWN} autre(s)")
+
+    with open(CONFLICTS_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"  📝 Détail complet : {CONFLICTS_FILE}")
+    print()
+
+
+# ============================================================
+# ASSEMBLAGE
+# ============================================================
+def build_data(priority=None):
+    """Fonction principale : lit tous les classeurs et assemble le data.json."""
+    excel_paths = find_excels(priority)
+    print(f"📂 Excel : {[os.path.basename(p) for p in excel_paths]}")
+    print(f"📁 Photos : {PHOTOS_DIR}")
+    print()
+
+    # ---- Lecture parallèle des classeurs ----
+    results = read_workbooks(excel_paths)
+    for r in results:
+        print(f"📂 {r['file']}")
+        for line in r["log"]:
+            print(f"  {line}")
+        print()
+
+    if not any("granits" in r["structure"] for r in results):
+        print("⚠️  Aucun classeur ne contient les onglets structurels (GRANITS, LISTES...).")
+        print()
+
+    # ---- Fusion par (référence, granit) ----
+    data, conflicts = merge_workbooks(results)
+    report_conflicts(conflicts)
+    for msg in complete_lignes(data):
+        print(msg)
+
+    granits_with_photo = sum(1 for g in data["granits"] if "photo" in g)
+    print("📋 Données fusionnées :")
+    print(f"  ✅ {len(data['granits'])} granits ({granits_with_photo} avec photo)")
+    print(f"  ✅ {len(data['poids'])} poids")
+    print(f"  ✅ {len(data['zones_transport'])} départements → zones")
+    print(f"  ✅ {len(data['tarifs_transport'])} tarifs transport")
+    print(f"  ✅ {len(data['departements'])} départements")
+    print(f"  ✅ Types : {data['types']}")
+    print(f"  ✅ Lignes monument : {data['lignes_monument']}")
+    print(f"  ✅ Lignes accessoire : {data['lignes_accessoire']}")
+
+    structural_keys = ["granits", "poids", "zones_transport", "tarifs_transport",
+                       "departements", "types", "lignes_monument", "lignes_accessoire"]
+    product_keys = [k for k in data if k not in structural_keys]
+    for key in product_keys:
+        print(f"  ✅ {key} : {len(data[key])} lignes")
 
     # Assurer que les clés attendues existent même si l'onglet est vide
     for expected_key in ["monuments", "semelles", "accessoires", "gravures", "lithos", "urnes"]:
@@ -547,14 +841,14 @@ def build_data():
             data[expected_key] = []
             print(f"  ⚠️  {expected_key} : onglet vide ou absent")
 
-    # ---- Données structurelles ----
-    data["poids"] = poids
-    data["zones_transport"] = zones_transport
-    data["tarifs_transport"] = tarifs_transport
-    data["departements"] = departements
-    data["types"] = types_list
-    data["lignes_monument"] = lignes_monument
-    data["lignes_accessoire"] = lignes_accessoire
+    # Ordre des clés identique au const DATA du HTML : granits, produits, structure
+    ordered = {"granits": data["granits"]}
+    for key in data:
+        if key not in structural_keys:
+            ordered[key] = data[key]
+    for key in structural_keys[1:]:
+        ordered[key] = data[key]
+    data = ordered
 
     # ---- Écriture JSON ----
     print()
@@ -570,10 +864,9 @@ def build_data():
     print("📸 État des dossiers photos :")
     photo_subdirs = ["monuments", "accessoires", "granits", "gravures", "lithos", "urnes"]
     # Ajouter les dossiers de nouveaux types détectés
-    for tab_name in product_tabs:
-        pt = extract_product_type(tab_name).lower() + "s"
-        if pt not in photo_subdirs:
-            photo_subdirs.append(pt)
+    for key in product_keys:
+        if key not in photo_subdirs:
+            photo_subdirs.append(key)
 
     for subdir in photo_subdirs:
         path = os.path.join(PHOTOS_DIR, subdir)
@@ -684,7 +977,17 @@ if __name__ == "__main__":
     print("=" * 60)
     print()
 
-    data = build_data()
+    priority = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--priority="):
+            priority = [p for p in arg[len("--priority="):].split(",") if p]
+
+    data = build_data(priority)
 
     if "--verify" in sys.argv:
         verify_against_html()
+
+    if "--catalogues" in sys.argv:
+        from build_catalogue import build_catalogues
+        print()
+        build_catalogues(data)
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+PHG-France — build_catalogue.py
+Génère les catalogues PDF (pro et famille) à partir de data.json + photos.
+
+Les pages sont rendues en parallèle, par blocs : un bloc par ligne de
+monument et un bloc par type d'accessoire. Chaque bloc est mis en cache
+sous catalogues/.cache/ avec une empreinte de ses lignes et de ses photos :
+une mise à jour qui ne touche qu'une ligne ne re-rend que ses pages,
+puis le PDF final est réassemblé.
+
+Usage:
+    python build_catalogue.py
+    python build_catalogue.py --pro | --famille   (un seul catalogue)
+    python build_catalogue.py --coef=2.5          (coefficient famille, défaut 2)
+    python build_catalogue.py --jobs=4            (nombre de processus)
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:
+    print("❌ reportlab non installé. Lance : py -m pip install reportlab")
+    sys.exit(1)
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    print("❌ Pillow non installé. Lance : py -m pip install pillow")
+    sys.exit(1)
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    print("❌ pypdf non installé. Lance : py -m pip install pypdf")
+    sys.exit(1)
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(SCRIPT_DIR, "data.json")
+CATALOGUES_DIR = os.path.join(SCRIPT_DIR, "catalogues")
+CACHE_DIR = os.path.join(CATALOGUES_DIR, ".cache")
+
+# Mêmes noms de fichiers que CATALOGUE_URLS dans index.html
+CATALOGUE_FILES = {
+    "pro": "catalogue_pro.pdf",
+    "famille": "catalogue_famille.pdf",
+}
+
+# Coefficient famille par défaut (identique au coef global du HTML)
+DEFAULT_COEF = 2
+
+# À incrémenter dès que la mise en page change : invalide tout le cache
+RENDER_VERSION = 3
+
+PHOTO_WIDTH = 60 * mm
+PHOTO_MAX_HEIGHT = 70 * mm
+# Les photos sont réduites à leur taille imprimée avant intégration au PDF
+PHOTO_DPI = 150
+PHOTO_JPEG_QUALITY = 85
+
+# Colonnes de prix par famille de produits : (clé JSON, en-tête)
+MONUMENT_PRICE_COLUMNS = [
+    ("prix_ht", "Prix HT"),
+    ("avec_semelle_130x230", "Semelle 130x230"),
+    ("avec_semelle_140x240", "Semelle 140x240"),
+    ("avec_semelle_150x250", "Semelle 150x250"),
+]
+ACCESSOIRE_PRICE_COLUMNS = [
+    ("prix_ht", "Prix HT"),
+]
+# En-tête de la colonne prix_ht du catalogue famille (prix × coefficient)
+FAMILLE_PRICE_LABEL = "Prix de vente HT"
+
+
+# ============================================================
+# UTILITAIRES
+# ============================================================
+def load_data():
+    """Charge data.json (généré par build.py)."""
+    if not os.path.isfile(DATA_FILE):
+        print(f"❌ '{DATA_FILE}' introuvable. Lance d'abord : py build.py")
+        sys.exit(1)
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_arg(name, default=None):
+    """Lit un argument '--name=valeur' dans sys.argv."""
+    prefix = f"--{name}="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+
+def format_prix(val, coef=1):
+    """Formate un prix à la française avec 2 décimales, comme fmt() dans
+    index.html : 1234.5 → '1 234,50 €'.
+    """
+    if val is None:
+        return "—"
+    txt = f"{float(val) * coef:,.2f}".replace(",", " ").replace(".", ",")
+    return f"{txt} €"
+
+
+def file_digest(path):
+    """Empreinte SHA-256 du contenu d'un fichier (chemin relatif à la racine)."""
+    h = hashlib.sha256()
+    with open(os.path.join(SCRIPT_DIR, path), "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ============================================================
+# DÉCOUPAGE EN BLOCS
+# ============================================================
+def group_by(items, key):
+    """Regroupe les items par valeur de `key` en conservant l'ordre d'apparition."""
+    groups = {}
+    for item in items:
+        groups.setdefault(item.get(key) or "", []).append(item)
+    return groups
+
+
+def build_chunks(data):
+    """Découpe le catalogue en blocs indépendants.
+    Un bloc par ligne de monument, puis un par type d'accessoire.
+    """
+    chunks = [{
+        "id": "couverture",
+        "kind": "couverture",
+        "title": "Catalogue PHG-France",
+        "rows": [],
+    }]
+    for ligne, rows in group_by(data.get("monuments", []), "ligne").items():
+        chunks.append({
+            "id": f"monument:{ligne}",
+            "kind": "monument",
+            "title": ligne or "Monuments",
+            "rows": rows,
+        })
+    for typ, rows in group_by(data.get("accessoires", []), "type").items():
+        chunks.append({
+            "id": f"accessoire:{typ}",
+            "kind": "accessoire",
+            "title": f"Accessoires — {typ}" if typ else "Accessoires",
+            "rows": rows,
+        })
+    return chunks
+
+
+def chunk_hash(chunk, mode, coef, photo_digests):
+    """Empreinte d'un bloc : ses lignes, le contenu de ses photos et les
+    paramètres de rendu. Deux blocs de même empreinte donnent les mêmes pages.
+    """
+    photos = sorted({r["photo"] for r in chunk["rows"] if r.get("photo")})
+    payload = {
+        "version": RENDER_VERSION,
+        "mode": mode,
+        "coef": float(coef) if mode == "famille" else 1.0,
+        "kind": chunk["kind"],
+        "title": chunk["title"],
+        "rows": chunk["rows"],
+        "photos": {p: photo_digests[p] for p in photos},
+        "photo_settings": [PHOTO_WIDTH, PHOTO_MAX_HEIGHT, PHOTO_DPI, PHOTO_JPEG_QUALITY],
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# RENDU D'UN BLOC (exécuté dans un processus séparé)
+# ============================================================
+def photo_flowable(path):
+    """Image redimensionnée en conservant les proportions, rééchantillonnée
+    à PHOTO_DPI pour sa taille imprimée (JPEG en mémoire).
+    """
+    full = os.path.join(SCRIPT_DIR, path)
+    with PILImage.open(full) as img:
+        w, h = img.size
+        width = PHOTO_WIDTH
+        height = width * h / w
+        if height > PHOTO_MAX_HEIGHT:
+            height = PHOTO_MAX_HEIGHT
+            width = height * w / h
+        # points (1/72 pouce) → pixels à PHOTO_DPI
+        px = (round(width / 72 * PHOTO_DPI), round(height / 72 * PHOTO_DPI))
+        img = img.convert("RGB")
+        if px[0] < w:
+            img = img.resize(px, PILImage.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=PHOTO_JPEG_QUALITY, optimize=True)
+    buf.seek(0)
+    return Image(buf, width=width, height=height)
+
+
+def price_table(rows, columns, mode, coef):
+    """Tableau granit × prix d'une référence."""
+    show_origine = mode == "pro"
+    labels = [
+        FAMILLE_PRICE_LABEL if mode == "famille" and key == "prix_ht" else label
+        for key, label in columns
+    ]
+    header = ["Granit"] + (["I/C"] if show_origine else []) + labels
+    table_rows = [header]
+    for r in rows:
+        line = [r.get("granit", "")]
+        if show_origine:
+            line.append(r.get("origine", ""))
+        line += [format_prix(r.get(key), coef) for key, _ in columns]
+        table_rows.append(line)
+
+    table = Table(table_rows, repeatRows=1, hAlign="LEFT")
+    table.setStyle(TableStyle([
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 8),
+        ("FONT", (0, 1), (-1, -1), "Helvetica", 8),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2c3e50")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f4f6f7")]),
+        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#bdc3c7")),
+        ("TOPPADDING", (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+    ]))
+    return table
+
+
+def render_chunk(chunk, mode, coef, output_path):
+    """Rend un bloc dans son propre PDF (écriture atomique dans le cache)."""
+    styles = getSampleStyleSheet()
+    story = []
+    label = "Tarif professionnel (prix d'achat HT)" if mode == "pro" else "Tarif public (prix de vente HT)"
+
+    if chunk["kind"] == "couverture":
+        story.append(Spacer(1, 80 * mm))
+        story.append(Paragraph(escape(chunk["title"]), styles["Title"]))
+        story.append(Paragraph(escape(label), styles["Heading2"]))
+    else:
+        columns = MONUMENT_PRICE_COLUMNS if chunk["kind"] == "monument" else ACCESSOIRE_PRICE_COLUMNS
+        refs = group_by(chunk["rows"], "reference")
+        for i, (ref, rows) in enumerate(refs.items()):
+            if i:
+                story.append(PageBreak())
+            story.append(Paragraph(escape(chunk["title"]), styles["Heading1"]))
+            story.append(Paragraph(escape(ref), styles["Heading2"]))
+            photo = next((r["photo"] for r in rows if r.get("photo")), None)
+            if photo and os.path.isfile(os.path.join(SCRIPT_DIR, photo)):
+                story.append(photo_flowable(photo))
+                story.append(Spacer(1, 4 * mm))
+            story.append(price_table(rows, columns, mode, coef))
+
+    tmp_path = output_path + f".{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(
+        tmp_path, pagesize=A4,
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm,
+        title=f"PHG-France — {chunk['title']}",
+    )
+    doc.build(story)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+# ============================================================
+# ASSEMBLAGE
+# ============================================================
+def generate_catalogue(data, mode, coef=DEFAULT_COEF, jobs=None, photo_digests=None):
+    """Génère un catalogue (pro ou famille) et retourne (chemin, chemins cache utilisés)."""
+    if photo_digests is None:
+        photo_digests = collect_photo_digests(data)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    chunks = build_chunks(data)
+
+    paths = []
+    todo = []
+    for chunk in chunks:
+        path = os.path.join(CACHE_DIR, f"{mode}-{chunk_hash(chunk, mode, coef, photo_digests)}.pdf")
+        paths.append(path)
+        if not os.path.isfile(path):
+            todo.append((chunk, path))
+
+    print(f"📄 Catalogue {mode} : {len(chunks)} blocs, {len(chunks) - len(todo)} en cache, {len(todo)} à rendre")
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                (chunk, pool.submit(render_chunk, chunk, mode, coef if mode == "famille" else 1, path))
+                for chunk, path in todo
+            ]
+            for chunk, future in futures:
+                future.result()
+                print(f"  ✅ {chunk['title']} ({len(chunk['rows'])} lignes)")
+
+    output = os.path.join(CATALOGUES_DIR, CATALOGUE_FILES[mode])
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    with open(output, "wb") as f:
+        writer.write(f)
+    print(f"  ✅ {os.path.relpath(output, SCRIPT_DIR)} : {len(writer.pages)} pages")
+    return output, paths
+
+
+def collect_photo_digests(data):
+    """Empreinte de chaque photo référencée par les monuments et accessoires."""
+    digests = {}
+    for key in ("monuments", "accessoires"):
+        for item in data.get(key, []):
+            photo = item.get("photo")
+            if photo and photo not in digests:
+                full = os.path.join(SCRIPT_DIR, photo)
+                digests[photo] = file_digest(photo) if os.path.isfile(full) else ""
+    return digests
+
+
+def prune_cache(keep):
+    """Supprime les blocs du cache qui ne sont plus utilisés."""
+    keep = {os.path.abspath(p) for p in keep}
+    removed = 0
+    for f in os.listdir(CACHE_DIR):
+        path = os.path.abspath(os.path.join(CACHE_DIR, f))
+        if f.endswith(".pdf") and path not in keep:
+            os.remove(path)
+            removed += 1
+    if removed:
+        print(f"🧹 {removed} bloc(s) obsolète(s) supprimé(s) du cache")
+
+
+def build_catalogues(data=None, modes=("pro", "famille"), coef=DEFAULT_COEF, jobs=None):
+    """Génère les catalogues demandés. Le cache n'est nettoyé que si tous
+    les catalogues sont régénérés, pour ne pas perdre les blocs de l'autre mode.
+    """
+    if data is None:
+        data = load_data()
+    photo_digests = collect_photo_digests(data)
+    used = []
+    outputs = []
+    for mode in modes:
+        output, paths = generate_catalogue(data, mode, coef, jobs, photo_digests)
+        outputs.append(output)
+        used += paths
+    if set(modes) == set(CATALOGUE_FILES):
+        prune_cache(used)
+    return outputs
+
+
+# ============================================================
+# MAIN
+# ============================================================
+if __name__ == "__main__":
+    print("=" * 60)
+    print("  PHG-France — Génération des catalogues PDF")
+    print(f"  {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+    print()
+
+    modes = [m for m in CATALOGUE_FILES if f"--{m}" in sys.argv] or list(CATALOGUE_FILES)
+    coef = float(parse_arg("coef", DEFAULT_COEF))
+    jobs = parse_arg("jobs")
+    build_catalogues(modes=modes, coef=coef, jobs=int(jobs) if jobs else None)
+
+    print()
+    print("🏁 Terminé.")
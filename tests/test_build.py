@@ -0,0 +1,58 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import build
+
+
+def workbook(filename, structure=None, products=None):
+    """Résultat de read_workbook simulé."""
+    return {
+        "file": filename,
+        "structure": structure or {},
+        "products": products or {},
+        "product_types": [],
+        "log": [],
+    }
+
+
+def test_merge_structural_workbooks_with_differing_poids_and_zones():
+    results = [
+        workbook("a.xlsx", {"poids": {"R1": 0.5, "R2": 1}, "zones_transport": {"01": "Zone 1"}}),
+        workbook("b.xlsx", {"poids": {"R1": 0.6, "R3": 2}, "zones_transport": {"01": "Zone 2", "02": "Zone 3"}}),
+    ]
+    data, conflicts = build.merge_workbooks(results)
+
+    assert data["poids"] == {"R1": 0.5, "R2": 1, "R3": 2}
+    assert data["zones_transport"] == {"01": "Zone 1", "02": "Zone 3"}
+    assert conflicts["poids"] == [{"key": "R1", "kept": "a.xlsx", "ignored": "b.xlsx", "fields": ["valeur"]}]
+    assert conflicts["zones_transport"] == [{"key": "01", "kept": "a.xlsx", "ignored": "b.xlsx", "fields": ["valeur"]}]
+
+
+def test_merge_matches_granit_spelled_differently():
+    a = {"reference": "PHGA - CL - A", "granit": "Gris indien / Tarn", "origine": "I", "prix_ht": 563}
+    b = {"reference": "PHGA-CL-A", "granit": "Gris Indien/Tarn ", "origine": "I", "prix_ht": 570}
+    merged, conflicts = build.merge_records([("a.xlsx", [a]), ("b.xlsx", [b])], build.product_key)
+
+    assert merged == [a]
+    assert conflicts == [{
+        "key": ("PHGA-CL-A", "gris indien/tarn"),
+        "kept": "a.xlsx",
+        "ignored": "b.xlsx",
+        "fields": ["reference", "granit", "prix_ht"],
+    }]
+
+
+def test_merge_rows_without_reference():
+    urne_a = {"type": "Urne A", "prix_ht": 50}
+    urne_b = {"type": "Urne B", "prix_ht": 60}
+    results = [
+        workbook("a.xlsx", products={"urnes": [urne_a, urne_b, urne_b]}),
+        workbook("b.xlsx", products={"urnes": [urne_a, {"type": "Urne C", "prix_ht": 70}]}),
+    ]
+    data, conflicts = build.merge_workbooks(results)
+
+    # Lignes d'un même classeur gardées telles quelles, doublons exacts entre classeurs fusionnés
+    assert data["urnes"] == [urne_a, urne_b, urne_b, {"type": "Urne C", "prix_ht": 70}]
+    assert "urnes" not in conflicts